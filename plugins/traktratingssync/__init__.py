@@ -1,17 +1,33 @@
 # -*- coding: utf-8 -*-
 """
 Trakt 评分同步到豆瓣插件
-从 Trakt 读取用户电影评分，通过 TMDB/IMDB 匹配豆瓣条目，并将评分同步到豆瓣（标记为「看过」并写入评分）。
+从 Trakt 读取用户电影（可选剧集）评分，通过 TMDB/IMDB 匹配豆瓣条目，并将评分同步到豆瓣（标记为「看过」并写入评分）。
 """
 import asyncio
-import math
-from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import requests
+from apscheduler.triggers.cron import CronTrigger
+from requests.adapters import HTTPAdapter
+
+try:
+    # orjson 解析大数组更快；未安装时退回标准库，两者都接受 bytes
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 from app.chain.media import MediaChain
 from app.core.config import global_vars
 from app.log import logger
 from app.plugins import _PluginBase
 from .douban_helper import DoubanHelper
+from .retry_helper import retry_call
 from app.schemas.types import MediaType
 from app.utils.http import RequestUtils
 
@@ -23,21 +39,129 @@ TRAKT_HEADERS_BASE = {
     "Accept": "application/json",
     "trakt-api-version": TRAKT_API_VERSION,
 }
+# Trakt 分页大小
+TRAKT_PAGE_LIMIT = 100
+# 可同步的 Trakt 评分类型；ratings/all 中的 season/episode 豆瓣无对应条目，忽略
+_TRAKT_MEDIA_TYPES = {"movie": MediaType.MOVIE, "show": MediaType.TV}
+# 豆瓣匹配、提交两个阶段各自的并发工作协程数
+_MATCH_CONCURRENCY = 8
+_SUBMIT_CONCURRENCY = 2
+# 豆瓣提交（阻塞 requests 调用）线程池大小，与提交协程数一致，每个线程各用一个 Session
+_DOUBAN_SUBMIT_WORKERS = _SUBMIT_CONCURRENCY
+
+# TMDB 匹配发起后延迟多久再并行发起标题/IMDB 匹配（秒）
+_FALLBACK_MATCH_DELAY = 1.0
+# 同步进度落盘：每处理 N 条（成功或失败）或每隔 N 秒保存一次
+CHECKPOINT_EVERY = 25
+CHECKPOINT_INTERVAL = 30
+# 待重试条目：第 n 次失败后等待 min(1 天, 2^n 分钟)，累计失败 N 次后放弃
+RETRY_MAX_ATTEMPTS = 6
+RETRY_MAX_DELAY = 86400
+# TMDB/IMDB→豆瓣 ID 映射缓存有效期（秒）；定时任务按天执行，取 7 天才能跨次命中
+_ID_CACHE_TTL = 7 * 24 * 3600
+# 豆瓣提交默认速率（次/秒，约 1.5 秒一次）与突发上限
+_DOUBAN_RATE_DEFAULT = 0.66
+_DOUBAN_BURST = 2
+# 未匹配到豆瓣条目的负缓存默认有效期（天）
+_NEGATIVE_TTL_DAYS_DEFAULT = 7
+# 过期缓存项中「TMDB 未匹配到」提示的保留期限（秒），超过后整项剔除
+_ID_CACHE_HINT_TTL = 30 * 24 * 3600
+# 映射缓存最多条数，超出后按最近最少使用淘汰
+_ID_CACHE_MAX = 10000
+
+_TRAKT_SESSION: Optional[requests.Session] = None
+_TRAKT_SESSION_LOCK = threading.Lock()
+
+
+def _get_trakt_session() -> requests.Session:
+    """懒加载共享的 Trakt Session，复用 TCP/TLS 连接（keep-alive）"""
+    global _TRAKT_SESSION
+    if _TRAKT_SESSION is None:
+        with _TRAKT_SESSION_LOCK:
+            if _TRAKT_SESSION is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _TRAKT_SESSION = session
+    return _TRAKT_SESSION
+
+
+# Trakt 0-10 分 → 豆瓣 1-5 星，即 ceil(trakt/2)，0 分按 1 星处理
+_TRAKT_TO_DOUBAN = (1, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5)
+
+
+class TokenBucket:
+    """线程安全的令牌桶，用于平滑豆瓣提交频率"""
 
+    def __init__(self, rate: float = 1.0, burst: int = 3):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
 
-def _trakt_rating_to_douban(trakt_rating: int) -> int:
-    """Trakt 1-10 转为豆瓣 1-5 星"""
-    if trakt_rating <= 0:
-        return 1
-    douban = math.ceil(trakt_rating / 2)
-    return int(douban)
+    def acquire(self) -> None:
+        """取走一个令牌，不足时 sleep 到补足为止"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+@dataclass(slots=True)
+class NormalizedItem:
+    """Trakt 评分项中同步所需的字段"""
+    key: str
+    title: str
+    year: Optional[int]
+    tmdb_id: Optional[int]
+    imdb_id: Optional[str]
+    trakt_rating: int
+    # Trakt 条目类型：movie / show
+    kind: str = "movie"
+    # Trakt 评分时间（截到秒的 ISO 字符串，可直接比较先后），仅用于 max_sync_count 取最近 N 条
+    rated_at: str = ""
+    # 换算后的豆瓣星级，构造时一次算好
+    douban_rating: int = field(init=False)
+
+    def __post_init__(self):
+        self.douban_rating = _TRAKT_TO_DOUBAN[max(0, min(10, self.trakt_rating))]
+
+
+@dataclass
+class _SyncContext:
+    """单轮同步在匹配/提交各工作协程间共享的状态与计数"""
+    # {key: [douban_id, trakt_rating]}
+    synced: Dict[str, List[Any]]
+    wait_retry: Dict[str, Any]
+    douban_helper: Optional[DoubanHelper] = None
+    success: int = 0
+    failed: int = 0
+    # 已同步且评分未变、本轮跳过的条数
+    unchanged: int = 0
+    # 未到重试时间、本轮跳过的条数
+    deferred: int = 0
+    # 无 tmdb/imdb、无法匹配豆瓣而跳过的条数
+    unmatchable: int = 0
+    # 自上次落盘以来处理（成功或失败）的条数
+    dirty: int = 0
+    flushed_at: float = field(default_factory=time.monotonic)
+    # 串行化落盘，保证后取的快照后写入
+    save_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # 本轮已打印过堆栈的异常类型，同类异常之后只记录摘要
+    seen_excs: Set[type] = field(default_factory=set)
 
 
 class TraktRatingsSync(_PluginBase):
     plugin_name = "Trakt 评分同步豆瓣"
-    plugin_desc = "从 Trakt 读取用户电影评分，匹配豆瓣条目并同步为「看过」及评分。"
+    plugin_desc = "从 Trakt 读取用户电影/剧集评分，匹配豆瓣条目并同步为「看过」及评分。"
     plugin_icon = "trakt.png"
-    plugin_version = "1.3.0"
+    plugin_version = "1.4.2"
     plugin_author = "ColorlessCube"
     author_url = "https://github.com/ColorlessCube"
     plugin_config_prefix = "trakt_ratings_sync_"
@@ -51,7 +175,17 @@ class TraktRatingsSync(_PluginBase):
     _private = True
     _only_movies = True
     _max_sync_count = 0  # 0 表示不限制
+    _douban_rate = _DOUBAN_RATE_DEFAULT
+    # 负缓存有效期（秒），0 表示不缓存未匹配结果
+    _negative_ttl = _NEGATIVE_TTL_DAYS_DEFAULT * 24 * 3600
     _cron = "0 2 * * *"  # 每天凌晨 2 点
+    _douban_bucket: Optional[TokenBucket] = None
+    # cron 解析结果，init_plugin 时生成一次，get_service 直接复用
+    _trigger: Optional[CronTrigger] = None
+    _douban_executor: Optional[ThreadPoolExecutor] = None
+    # {"tmdb:<id>" / "tmdb_tv:<id>" / "imdb:<id>": [douban_id, 缓存时间戳, tmdb_missed]}，按使用顺序排列；
+    # douban_id 为 None 表示上次未匹配到（负缓存）；tmdb_missed 为 True 表示上次 TMDB 查询确实返回了空结果
+    _id_cache: "OrderedDict[str, List[Any]]" = OrderedDict()
 
     def init_plugin(self, config: dict = None):
         config = config or {}
@@ -63,153 +197,500 @@ class TraktRatingsSync(_PluginBase):
         self._only_movies = config.get("only_movies", True)
         self._max_sync_count = int(config.get("max_sync_count") or 0) if config.get("max_sync_count") is not None else 0
         self._cron = config.get("cron", "0 2 * * *") or "0 2 * * *"
+        self._trigger = self._build_trigger(self._cron)
+        try:
+            self._douban_rate = float(config.get("douban_rate") or _DOUBAN_RATE_DEFAULT)
+        except (TypeError, ValueError):
+            self._douban_rate = _DOUBAN_RATE_DEFAULT
+        if self._douban_rate <= 0:
+            self._douban_rate = _DOUBAN_RATE_DEFAULT
+        negative_ttl_days = config.get("negative_ttl_days")
+        try:
+            # 留空按默认值处理，显式填 0 才关闭负缓存
+            negative_ttl_days = float(negative_ttl_days) if negative_ttl_days not in (None, "") \
+                else _NEGATIVE_TTL_DAYS_DEFAULT
+        except (TypeError, ValueError):
+            negative_ttl_days = _NEGATIVE_TTL_DAYS_DEFAULT
+        self._negative_ttl = max(0.0, negative_ttl_days) * 24 * 3600
+        self._douban_bucket = TokenBucket(rate=self._douban_rate, burst=_DOUBAN_BURST)
+        if self._douban_executor:
+            self._douban_executor.shutdown(wait=False)
+        self._douban_executor = ThreadPoolExecutor(max_workers=_DOUBAN_SUBMIT_WORKERS,
+                                                   thread_name_prefix="trakt_douban_submit")
+        self._id_cache = OrderedDict(self.get_data("id_cache") or {})
 
-    def _fetch_trakt_ratings_movies(self) -> List[Dict[str, Any]]:
-        """拉取 Trakt 用户电影评分列表（公开接口，仅需 client_id）。
+    def _iter_trakt_ratings_pages(self, etags: Dict[str, str]) -> Iterator[List[Dict[str, Any]]]:
+        """分页拉取 Trakt 用户评分（公开接口，仅需 client_id），逐页返回评分列表。
+        仅同步电影时请求 ratings/movies，否则请求 ratings/all 一次拿到电影和剧集；两者都不需要 extended=full。
         API 文档：https://trakt.docs.apiary.io 要求 Header：Content-Type、trakt-api-key、trakt-api-version。
+        每页带上次的 etag 做条件请求，未变化(304)的页不返回；etags 按页号原地更新。
         """
         if not self._trakt_username or not self._trakt_client_id:
-            return []
-        url = f"{TRAKT_API_BASE}/users/{self._trakt_username}/ratings/movies"
-        headers = {
-            **TRAKT_HEADERS_BASE,
-            "trakt-api-key": self._trakt_client_id,
-        }
-        try:
-            resp = RequestUtils(timeout=30, headers=headers).get_res(url=url)
-            if not resp:
-                logger.warning("Trakt API 请求失败（网络或超时）")
-                return []
-            if resp.status_code == 200:
-                data = resp.json()
-                if not isinstance(data, list):
-                    logger.warning("Trakt API 返回格式异常，期望数组")
-                    return []
-                return data
-            if resp.status_code == 429:
-                logger.warning("Trakt API 触发频率限制(429)，请稍后再试")
-                return []
-            if resp.status_code == 403:
-                logger.warning("Trakt API 拒绝访问(403)，请检查 Client ID 或该用户评分是否设为私有")
-                return []
-            if resp.status_code == 404:
-                logger.warning("Trakt 用户不存在或未公开评分: %s", self._trakt_username)
-                return []
-            logger.warning("Trakt API 返回异常: status=%s body=%s", resp.status_code, (resp.text or "")[:200])
-        except Exception as e:
-            logger.error("拉取 Trakt 评分失败: %s", e, exc_info=True)
-        return []
-
-    async def _get_douban_id_by_tmdb(self, tmdb_id: Optional[int], imdb_id: Optional[str],
-                                      title: Optional[str] = None, year: Optional[int] = None) -> Optional[str]:
-        """根据 TMDB ID（及可选 IMDB/标题/年份）获取豆瓣 subject_id"""
-        if tmdb_id:
-            try:
-                douban_info = await MediaChain().async_get_doubaninfo_by_tmdbid(
-                    tmdbid=int(tmdb_id), mtype=MediaType.MOVIE
-                )
-                if douban_info and douban_info.get("id"):
-                    return str(douban_info["id"])
-            except Exception as e:
-                logger.debug(f"TMDB {tmdb_id} 匹配豆瓣失败: {e}")
-        if title or imdb_id:
+            return
+        url = f"{TRAKT_API_BASE}/users/{self._trakt_username}/ratings/{self._ratings_path()}"
+        session = _get_trakt_session()
+        page, page_count = 1, 1
+        while page <= page_count:
+            headers = {
+                **TRAKT_HEADERS_BASE,
+                "trakt-api-key": self._trakt_client_id,
+            }
+            if etags.get(str(page)):
+                headers["If-None-Match"] = etags[str(page)]
             try:
-                douban_info = await MediaChain().async_match_doubaninfo(
-                    name=title or "Unknown",
-                    year=str(year) if year else None,
-                    mtype=MediaType.MOVIE,
-                    imdbid=imdb_id,
+                # 无响应、429（遵循 Retry-After）、5xx 时退避重试，其余状态码直接处理
+                resp = retry_call(
+                    lambda: RequestUtils(session=session, timeout=30, headers=headers).get_res(
+                        url=url, params={"page": page, "limit": TRAKT_PAGE_LIMIT}
+                    ),
+                    label=f"Trakt 评分第 {page} 页",
                 )
-                if douban_info and douban_info.get("id"):
-                    return str(douban_info["id"])
+                if resp is None:
+                    logger.warning("Trakt API 请求失败（网络或超时）")
+                    return
+                if resp.status_code == 304:
+                    # 304 不一定带分页头，回退到上次记录的页数
+                    page_count = int(resp.headers.get("X-Pagination-Page-Count") or max(page_count, len(etags)))
+                    page += 1
+                    continue
+                if resp.status_code == 200:
+                    data = _json_loads(resp.content)
+                    if not isinstance(data, list):
+                        logger.warning("Trakt API 返回格式异常，期望数组")
+                        return
+                    page_count = int(resp.headers.get("X-Pagination-Page-Count") or 1)
+                    if resp.headers.get("ETag"):
+                        etags[str(page)] = resp.headers["ETag"]
+                    else:
+                        etags.pop(str(page), None)
+                    yield data
+                    page += 1
+                    continue
+                if resp.status_code == 429:
+                    logger.warning("Trakt API 触发频率限制(429)，请稍后再试")
+                    return
+                if resp.status_code == 403:
+                    logger.warning("Trakt API 拒绝访问(403)，请检查 Client ID 或该用户评分是否设为私有")
+                    return
+                if resp.status_code == 404:
+                    logger.warning("Trakt 用户不存在或未公开评分: %s", self._trakt_username)
+                    return
+                logger.warning("Trakt API 返回异常: status=%s body=%s", resp.status_code, (resp.text or "")[:200])
+                return
             except Exception as e:
-                logger.debug(f"标题/IMDB 匹配豆瓣失败 {title}: {e}")
+                logger.error("拉取 Trakt 评分失败: %s", e, exc_info=True)
+                return
+        for stale in [k for k in etags if int(k) > page_count]:
+            del etags[stale]
+
+    @staticmethod
+    def _normalize_items(items: List[Dict[str, Any]], ctx: _SyncContext) -> List[NormalizedItem]:
+        """把 Trakt 评分项一次性解析为 NormalizedItem，后续流程只做属性访问。
+        Trakt 返回项结构：{ "rating": 1-10, "rated_at": "...", "type": "movie", "movie": { "title", "year", "ids": { "trakt", "slug", "imdb", "tmdb" } } }，
+        剧集为 "type": "show" 与同结构的 "show"。
+        既无 tmdb 也无 imdb 的条目豆瓣无从匹配，在此直接丢弃，条数计入 ctx.unmatchable，在本轮汇总日志中输出。
+        """
+        normalized = []
+        for item in items:
+            kind = item.get("type") or "movie"
+            if kind not in _TRAKT_MEDIA_TYPES:
+                continue
+            movie = item.get(kind) if isinstance(item.get(kind), dict) else {}
+            ids = movie.get("ids") if isinstance(movie.get("ids"), dict) else {}
+            trakt_rating = item.get("rating")
+            if not isinstance(trakt_rating, (int, float)):
+                trakt_rating = 0
+            title = movie.get("title", "未知")
+            year = movie.get("year")
+            trakt_id = ids.get("trakt") or movie.get("trakt_id")
+            tmdb_id = ids.get("tmdb")
+            if not tmdb_id and not ids.get("imdb"):
+                ctx.unmatchable += 1
+                continue
+            # 去重 key：trakt id > slug > 标题_年份；剧集与电影的 trakt id 各自编号，加前缀区分
+            key = str(trakt_id) if trakt_id else ids.get("slug") or f"{title}_{year}"
+            normalized.append(NormalizedItem(
+                key=key if kind == "movie" else f"{kind}:{key}",
+                title=title,
+                year=year,
+                tmdb_id=int(tmdb_id) if tmdb_id else None,
+                imdb_id=ids.get("imdb"),
+                trakt_rating=int(trakt_rating),
+                kind=kind,
+                rated_at=(item.get("rated_at") or "")[:19],
+            ))
+        return normalized
+
+    @staticmethod
+    def _items_from_wait_retry(wait_retry: Dict[str, Any]) -> List[NormalizedItem]:
+        """把已到重试时间的待重试记录还原为 NormalizedItem，最早到期的排在前面"""
+        now = time.time()
+        due = sorted(
+            ((key, entry) for key, entry in wait_retry.items() if entry.get("next_try_ts", 0) <= now),
+            key=lambda kv: kv[1].get("next_try_ts", 0),
+        )
+        return [
+            NormalizedItem(
+                key=key,
+                title=entry.get("title"),
+                year=entry.get("year"),
+                tmdb_id=int(entry["tmdb_id"]) if entry.get("tmdb_id") else None,
+                imdb_id=entry.get("imdb_id"),
+                trakt_rating=int(entry.get("trakt_rating") or 0),
+                kind=entry.get("type") or "movie",
+            )
+            for key, entry in due
+        ]
+
+    async def _get_douban_id_by_tmdb(self, tmdb_id: Optional[int], imdb_id: Optional[str],
+                                      title: Optional[str] = None, year: Optional[int] = None,
+                                      mtype: MediaType = MediaType.MOVIE) -> Optional[str]:
+        """根据 TMDB ID（及可选 IMDB/标题/年份）获取豆瓣 subject_id；先查 id_cache，匹配结果写入 TMDB、IMDB 两个键。
+        未匹配到时记一条负缓存，有效期内直接返回 None，不再重复查询。
+        缓存过期后重新匹配时，若上次 TMDB 确实未匹配到，本次跳过 TMDB 直接走标题/IMDB；
+        跳过时不再写入该提示，下次重新匹配仍会尝试 TMDB，避免一次失败永久改走标题匹配。
+        """
+        cache_keys = self._id_cache_keys(tmdb_id, imdb_id, mtype)
+        now = time.time()
+        skip_tmdb = False
+        for cache_key in cache_keys:
+            cached = self._id_cache.get(cache_key)
+            if not cached:
+                continue
+            if self._id_cache_fresh(cached, now):
+                self._id_cache.move_to_end(cache_key)
+                if not cached[0]:
+                    logger.debug(f"豆瓣条目此前未匹配到，跳过查询: {title} ({year})")
+                return cached[0]
+            skip_tmdb = skip_tmdb or self._tmdb_missed(cached)
+        subject_id, tmdb_missed = await self._match_douban_id(tmdb_id, imdb_id, title=title, year=year, mtype=mtype,
+                                                      skip_tmdb=skip_tmdb)
+        if subject_id or self._negative_ttl:
+            for cache_key in cache_keys:
+                self._id_cache[cache_key] = [subject_id, now, tmdb_missed]
+                self._id_cache.move_to_end(cache_key)
+            while len(self._id_cache) > _ID_CACHE_MAX:
+                self._id_cache.popitem(last=False)
+        return subject_id
+
+    def _cached_miss_until(self, item: NormalizedItem) -> Optional[float]:
+        """条目在 id_cache 中有有效的负缓存时返回其过期时间戳；命中或无缓存时返回 None（与查询时的键顺序一致）"""
+        now = time.time()
+        for cache_key in self._id_cache_keys(item.tmdb_id, item.imdb_id, _TRAKT_MEDIA_TYPES[item.kind]):
+            cached = self._id_cache.get(cache_key)
+            if cached and self._id_cache_fresh(cached, now):
+                return None if cached[0] else cached[1] + self._negative_ttl
+        return None
+
+    def _id_cache_fresh(self, entry: List[Any], now: float) -> bool:
+        """缓存项是否仍有效：命中项按 _ID_CACHE_TTL，未匹配项按负缓存有效期"""
+        return now - entry[1] < (_ID_CACHE_TTL if entry[0] else self._negative_ttl)
+
+    @staticmethod
+    def _tmdb_missed(entry: List[Any]) -> bool:
+        """缓存项是否记录了 TMDB 查询确实未匹配到"""
+        return entry[2] is True
+
+    @staticmethod
+    def _id_cache_keys(tmdb_id: Optional[int], imdb_id: Optional[str], mtype: MediaType) -> List[str]:
+        """id_cache 的键：电影与剧集的 TMDB ID 各自编号需区分，IMDB ID 全局唯一"""
+        keys = []
+        if tmdb_id:
+            keys.append(f"tmdb:{tmdb_id}" if mtype == MediaType.MOVIE else f"tmdb_tv:{tmdb_id}")
+        if imdb_id:
+            keys.append(f"imdb:{imdb_id}")
+        return keys
+
+    @staticmethod
+    async def _match_by_tmdb(tmdb_id: int, mtype: MediaType = MediaType.MOVIE) -> Optional[str]:
+        """按 TMDB ID 匹配豆瓣 subject_id"""
+        try:
+            douban_info = await MediaChain().async_get_doubaninfo_by_tmdbid(
+                tmdbid=int(tmdb_id), mtype=mtype
+            )
+            if douban_info and douban_info.get("id"):
+                return str(douban_info["id"])
+        except Exception as e:
+            logger.debug(f"TMDB {tmdb_id} 匹配豆瓣失败: {e}")
+        return None
+
+    @staticmethod
+    async def _match_by_title(imdb_id: Optional[str], title: Optional[str], year: Optional[int],
+                              mtype: MediaType = MediaType.MOVIE, delay: float = 0) -> Optional[str]:
+        """按标题/年份/IMDB 匹配豆瓣 subject_id；delay 用于推迟发起，TMDB 够快时可在发起前被取消"""
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            douban_info = await MediaChain().async_match_doubaninfo(
+                name=title or "Unknown",
+                year=str(year) if year else None,
+                mtype=mtype,
+                imdbid=imdb_id,
+            )
+            if douban_info and douban_info.get("id"):
+                return str(douban_info["id"])
+        except Exception as e:
+            logger.debug(f"标题/IMDB 匹配豆瓣失败 {title}: {e}")
         return None
 
-    def _sync_one(self, item: Dict[str, Any], douban_helper: DoubanHelper,
-                  synced: Dict[str, Any], wait_retry: Dict[str, Any]) -> bool:
-        """同步单条评分到豆瓣（同步上下文，内部用 run_coroutine_threadsafe 调异步匹配）。
-        Trakt 返回项结构：{ "rating": 1-10, "rated_at": "...", "movie": { "title", "year", "ids": { "trakt", "slug", "imdb", "tmdb" } } }。
+    async def _match_douban_id(self, tmdb_id: Optional[int], imdb_id: Optional[str],
+                               title: Optional[str] = None, year: Optional[int] = None,
+                               mtype: MediaType = MediaType.MOVIE,
+                               skip_tmdb: bool = False) -> Tuple[Optional[str], bool]:
+        """通过 MediaChain 实际匹配豆瓣 subject_id：TMDB 与标题/IMDB 并行发起（后者延后 1 秒），
+        取先得到的结果，两者同时成功时以 TMDB 为准。
+        返回 (subject_id, tmdb_missed)：tmdb_missed 仅在 TMDB 查询完成且返回空时为 True，
+        TMDB 未发起、较慢被取消时均为 False。skip_tmdb 为 True 且有标题/IMDB 时只走标题/IMDB。
         """
-        movie = item.get("movie") if isinstance(item.get("movie"), dict) else {}
-        ids = movie.get("ids") if isinstance(movie.get("ids"), dict) else {}
-        trakt_rating = item.get("rating")
-        if not isinstance(trakt_rating, (int, float)):
-            trakt_rating = 0
-        trakt_rating = int(trakt_rating)
-        douban_rating = _trakt_rating_to_douban(trakt_rating)
-        tmdb_id = ids.get("tmdb")
-        imdb_id = ids.get("imdb")
-        trakt_id = ids.get("trakt") or movie.get("trakt_id")
-        slug = ids.get("slug") or ""
-        title = movie.get("title", "未知")
-        year = movie.get("year")
-
-        if not tmdb_id and not imdb_id:
-            logger.warning(f"Trakt 条目无 tmdb/imdb: {title} ({year})")
-            return False
+        has_fallback = bool(title or imdb_id)
+        if not has_fallback:
+            if not tmdb_id:
+                return None, False
+            subject_id = await self._match_by_tmdb(tmdb_id, mtype)
+            return subject_id, subject_id is None
+        if not tmdb_id or skip_tmdb:
+            return await self._match_by_title(imdb_id, title, year, mtype), False
 
-        key = str(trakt_id) if trakt_id else slug or f"{title}_{year}"
-        if key in synced:
-            prev = synced[key]
-            if prev.get("trakt_rating") == trakt_rating and prev.get("douban_id"):
-                logger.debug(f"已同步过且评分未变，跳过: {title}")
-                return True
+        tmdb_task = asyncio.create_task(self._match_by_tmdb(tmdb_id, mtype))
+        title_task = asyncio.create_task(
+            self._match_by_title(imdb_id, title, year, mtype, delay=_FALLBACK_MATCH_DELAY)
+        )
+        try:
+            done, _ = await asyncio.wait({tmdb_task, title_task}, return_when=asyncio.FIRST_COMPLETED)
+            if tmdb_task in done and tmdb_task.result():
+                return tmdb_task.result(), False
+            if title_task in done and title_task.result():
+                # TMDB 仍在查询，只是较慢，不算未匹配
+                return title_task.result(), False
+            # 先完成的一方未匹配到，等另一方的结果
+            if tmdb_task in done:
+                return await title_task, True
+            subject_id = await tmdb_task
+            return subject_id, subject_id is None
+        finally:
+            for task in (tmdb_task, title_task):
+                if not task.done():
+                    task.cancel()
+
+    def _submit_douban(self, douban_helper: DoubanHelper, subject_id: str, douban_rating: int) -> bool:
+        """按令牌桶节流后提交「看过」及评分到豆瓣（阻塞调用，需在线程中执行）"""
+        if self._douban_bucket:
+            self._douban_bucket.acquire()
+        return douban_helper.set_watching_status(
+            subject_id=subject_id,
+            status="collect",
+            private=self._private,
+            rating=douban_rating,
+        )
+
+    @staticmethod
+    def _mark_retry(ctx: _SyncContext, key: str, entry: Dict[str, Any]) -> None:
+        """记录一次失败：按失败次数指数退避安排下次重试，超过上限后不再重试"""
+        attempts = int((ctx.wait_retry.get(key) or {}).get("attempts", 0))
+        # 失败同样改变了 wait_retry，计入待落盘条数
+        ctx.dirty += 1
+        if attempts + 1 >= RETRY_MAX_ATTEMPTS:
+            ctx.wait_retry.pop(key, None)
+            logger.warning(f"已连续失败 {attempts + 1} 次，不再重试: {entry.get('title')} ({entry.get('year')})")
+            return
+        ctx.wait_retry[key] = {
+            **entry,
+            "attempts": attempts + 1,
+            "next_try_ts": time.time() + min(RETRY_MAX_DELAY, 2 ** attempts * 60),
+        }
+
+    @staticmethod
+    def _retry_entry(item: NormalizedItem) -> Dict[str, Any]:
+        """待重试记录；带上 tmdb/imdb，所在分页未变化(304)时可据此还原条目"""
+        return {
+            "title": item.title,
+            "year": item.year,
+            "trakt_rating": item.trakt_rating,
+            "tmdb_id": item.tmdb_id,
+            "imdb_id": item.imdb_id,
+            "type": item.kind,
+        }
+
+    async def _match_one_async(self, item: NormalizedItem, ctx: _SyncContext) -> Optional[str]:
+        """匹配阶段：返回需要提交的豆瓣 subject_id；匹配失败时记入 ctx 计数并返回 None。
+        已同步且评分未变、未到重试时间的条目已由 _produce_items 过滤，无 tmdb/imdb 的条目已由 _normalize_items 丢弃。
+        """
+        key, title, year = item.key, item.title, item.year
+
+        # 已同步过、仅评分变化的条目直接复用豆瓣 ID 重新提交
+        subject_id = (ctx.synced.get(key) or (None,))[0]
+        if subject_id:
+            return subject_id
+
+        # 负缓存有效期内不再查询，也不计失败次数，推迟到负缓存过期后再重试
+        miss_until = self._cached_miss_until(item)
+        if miss_until:
+            ctx.wait_retry[key] = {**(ctx.wait_retry.get(key) or {}), **self._retry_entry(item),
+                                   "next_try_ts": miss_until}
+            ctx.deferred += 1
+            ctx.dirty += 1
+            await self._checkpoint(ctx)
+            logger.debug(f"豆瓣条目此前未匹配到，推迟到负缓存过期后重试: {title} ({year})")
+            return None
 
         try:
-            future = asyncio.run_coroutine_threadsafe(
+            subject_id = await asyncio.wait_for(
                 self._get_douban_id_by_tmdb(
-                    int(tmdb_id) if tmdb_id else None,
-                    imdb_id,
+                    item.tmdb_id,
+                    item.imdb_id,
                     title=title,
                     year=year,
+                    mtype=_TRAKT_MEDIA_TYPES[item.kind],
                 ),
-                global_vars.loop,
+                timeout=30,
             )
-            subject_id = future.result(timeout=30)
         except Exception as e:
             logger.warning(f"匹配豆瓣失败 {title} ({year}): {e}")
-            if key not in wait_retry:
-                wait_retry[key] = {
-                    "title": title,
-                    "year": year,
-                    "trakt_rating": trakt_rating,
-                    "tmdb_id": tmdb_id,
-                    "imdb_id": imdb_id,
-                }
-            return False
-
+            subject_id = None
+        else:
+            if not subject_id:
+                logger.warning(f"未找到豆瓣条目: {title} ({year})")
         if not subject_id:
-            logger.warning(f"未找到豆瓣条目: {title} ({year})")
-            return False
+            self._mark_retry(ctx, key, self._retry_entry(item))
+            ctx.failed += 1
+            await self._checkpoint(ctx)
+        return subject_id
 
-        ret = douban_helper.set_watching_status(
-            subject_id=subject_id,
-            status="collect",
-            private=self._private,
-            rating=douban_rating,
+    async def _submit_one_async(self, item: NormalizedItem, subject_id: str, ctx: _SyncContext) -> None:
+        """提交阶段：把评分提交到豆瓣并记录结果"""
+        douban_rating = item.douban_rating
+        # 豆瓣提交为同步 requests 调用，放到专用线程池执行，避免阻塞事件循环
+        ret = await asyncio.get_running_loop().run_in_executor(
+            self._douban_executor, self._submit_douban, ctx.douban_helper, subject_id, douban_rating
         )
         if ret:
-            synced[key] = {
-                "douban_id": subject_id,
-                "trakt_rating": trakt_rating,
-                "title": title,
-                "year": year,
-            }
-            if key in wait_retry:
-                del wait_retry[key]
-            logger.info(f"同步成功: {title} ({year}) -> 豆瓣 {subject_id} 评分 {douban_rating} 星")
+            ctx.synced[item.key] = [subject_id, item.trakt_rating]
+            ctx.wait_retry.pop(item.key, None)
+            ctx.success += 1
+            ctx.dirty += 1
+            await self._checkpoint(ctx)
+            logger.info(f"同步成功: {item.title} ({item.year}) -> 豆瓣 {subject_id} 评分 {douban_rating} 星")
+        else:
+            logger.error(f"豆瓣提交失败: {item.title} ({item.year}) subject_id={subject_id}")
+            self._mark_retry(ctx, item.key, {**self._retry_entry(item), "subject_id": subject_id})
+            ctx.failed += 1
+            await self._checkpoint(ctx)
+
+    async def _produce_items(self, queue: asyncio.Queue, ctx: _SyncContext,
+                             etags: Dict[str, str], retry_snapshot: Dict[str, Any]) -> int:
+        """在线程中分页拉取 Trakt 评分，过滤后送入匹配队列，返回投递条数；豆瓣 Helper 初始化失败返回 -1。
+        豆瓣 Helper 在首次有条目需要投递时才初始化，评分全部未变化时不访问豆瓣。
+        """
+        pages = self._iter_trakt_ratings_pages(etags)
+        seen_keys = set()
+        count = 0
+
+        async def _put(batch: List[NormalizedItem]) -> bool:
+            nonlocal count
+            # 已同步且评分未变、或未到重试时间的条目在投递前就过滤掉，不占用匹配协程
+            now = time.time()
+            pending = []
+            for item in batch:
+                seen_keys.add(item.key)
+                subject_id, synced_rating = ctx.synced.get(item.key) or (None, None)
+                if subject_id and synced_rating == item.trakt_rating:
+                    ctx.unchanged += 1
+                elif (ctx.wait_retry.get(item.key) or {}).get("next_try_ts", 0) > now:
+                    ctx.deferred += 1
+                else:
+                    pending.append(item)
+            if not pending:
+                return True
+            if ctx.douban_helper is None:
+                try:
+                    ctx.douban_helper = await asyncio.to_thread(DoubanHelper, user_cookie=self._douban_cookie or None)
+                except Exception as e:
+                    logger.error(f"初始化豆瓣 Helper 失败（请检查 Cookie/CookieCloud）: {e}")
+                    return False
+            for item in pending:
+                await queue.put(item)
+            count += len(pending)
             return True
+
+        if self._max_sync_count > 0:
+            # 按评分时间倒序，优先同步最近评分的；需要拉完全部分页，但边拉边只保留最近的 N 条，不整体展开排序。
+            # 先逐页归一化，剔除季/集评分与无 tmdb/imdb 的条目后再取前 N，避免它们占用名额
+            items = await asyncio.to_thread(
+                heapq.nlargest, self._max_sync_count,
+                (item for page in pages for item in self._normalize_items(page, ctx)),
+                key=lambda item: item.rated_at,
+            )
+            logger.info("本次最多同步 %d 条，已按最近评分取前 N 条", self._max_sync_count)
+            if not await _put(items):
+                return -1
         else:
-            logger.error(f"豆瓣提交失败: {title} ({year}) subject_id={subject_id}")
-            if key not in wait_retry:
-                wait_retry[key] = {
-                    "title": title,
-                    "year": year,
-                    "trakt_rating": trakt_rating,
-                    "subject_id": subject_id,
-                }
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    break
+                if not await _put(self._normalize_items(page, ctx)):
+                    return -1
+
+        # 所在分页未变化(304)的失败条目不会随分页返回，单独补回重试
+        retry_items = [it for it in self._items_from_wait_retry(retry_snapshot) if it.key not in seen_keys]
+        if self._max_sync_count > 0:
+            # 重试条目同样计入单次最大同步数量，按到期先后只补足剩余名额
+            retry_items = retry_items[: max(0, self._max_sync_count - count)]
+        if retry_items:
+            logger.info("补充重试 %d 条此前失败的条目", len(retry_items))
+            if not await _put(retry_items):
+                return -1
+        return count
+
+    async def _sync_async(self, ctx: _SyncContext, etags: Dict[str, str],
+                          retry_snapshot: Dict[str, Any]) -> bool:
+        """一轮完整同步：拉取 → 匹配 → 提交三段经队列流水线并行，结果计入 ctx；中止时返回 False。
+        匹配与提交各用独立的工作协程，豆瓣提交受限速约束，不拖慢匹配。
+        """
+        match_q: asyncio.Queue = asyncio.Queue(maxsize=TRAKT_PAGE_LIMIT)
+        submit_q: asyncio.Queue = asyncio.Queue(maxsize=TRAKT_PAGE_LIMIT)
+
+        async def _matcher():
+            while True:
+                item = await match_q.get()
+                try:
+                    subject_id = await self._match_one_async(item, ctx)
+                    if subject_id:
+                        await submit_q.put((item, subject_id))
+                except Exception as e:
+                    ctx.failed += 1
+                    self._log_item_error(ctx, "匹配单条失败", e)
+                finally:
+                    match_q.task_done()
+
+        async def _submitter():
+            while True:
+                item, subject_id = await submit_q.get()
+                try:
+                    await self._submit_one_async(item, subject_id, ctx)
+                except Exception as e:
+                    ctx.failed += 1
+                    self._log_item_error(ctx, "同步单条失败", e)
+                finally:
+                    submit_q.task_done()
+
+        workers = [asyncio.create_task(_matcher()) for _ in range(_MATCH_CONCURRENCY)]
+        workers += [asyncio.create_task(_submitter()) for _ in range(_SUBMIT_CONCURRENCY)]
+        try:
+            produced = await self._produce_items(match_q, ctx, etags, retry_snapshot)
+            # 匹配协程在 task_done 之前已把结果放入 submit_q，先等匹配队列清空再等提交队列
+            await match_q.join()
+            await submit_q.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self._checkpoint(ctx, force=True)
+        if produced < 0:
             return False
+        if not produced:
+            logger.info("没有需要同步的 Trakt 评分（评分未变化或接口异常）")
+        return True
 
     def sync_trakt_ratings_to_douban(self):
         """定时任务入口：拉取 Trakt 评分并同步到豆瓣"""
@@ -220,45 +701,100 @@ class TraktRatingsSync(_PluginBase):
             logger.warning("未配置 Trakt 用户名或 Client ID，跳过同步")
             return
 
+        # 整轮同步只在事件循环上跑一次协程，调度线程仅等待结果
+        asyncio.run_coroutine_threadsafe(self._run_sync_async(), global_vars.loop).result()
+
+    async def _run_sync_async(self) -> None:
+        """一轮完整同步：读取进度、运行流水线、记录 etag。数据库读写放到线程中执行，不阻塞事件循环"""
         logger.info("开始执行 Trakt 评分同步到豆瓣...")
-        items = self._fetch_trakt_ratings_movies()
-        if not items:
-            logger.info("未获取到 Trakt 电影评分或接口异常")
+        synced = await asyncio.to_thread(self._load_synced)
+        wait_retry: Dict[str, Any] = await asyncio.to_thread(self.get_data, "wait") or {}
+        # 快照：同步过程中 wait_retry 会被修改
+        retry_snapshot = dict(wait_retry)
+        # 限制同步数量时只处理了最近的 N 条，未处理的条目所在页不能被 304 跳过，因此不使用也不记录 etag；
+        # etag 按评分接口与数量限制记录作用域，切换「仅同步电影」等设置后完整重新拉取
+        scope = self._etag_scope()
+        stored = await asyncio.to_thread(self.get_data, "trakt_etags") or {}
+        use_etags = self._max_sync_count <= 0
+        etags: Dict[str, str] = dict(stored.get("pages") or {}) if use_etags and stored.get("scope") == scope else {}
+        ctx = _SyncContext(synced=synced, wait_retry=wait_retry)
+
+        if not await self._sync_async(ctx, etags, retry_snapshot):
             return
+        # 整轮处理完再记录 etag，中途失败时下次仍会完整拉取
+        if use_etags:
+            await asyncio.to_thread(self.save_data, "trakt_etags", {"scope": scope, "pages": etags})
+        logger.info(f"Trakt 评分同步完成: 成功 {ctx.success}, 失败 {ctx.failed}, "
+                    f"评分未变 {ctx.unchanged}, 未到重试时间 {ctx.deferred}, 无 tmdb/imdb 跳过 {ctx.unmatchable}")
 
-        # 按评分时间倒序，优先同步最近评分的；再按最大数量截断
-        def _rated_at_sort_key(x: Dict[str, Any]) -> str:
-            return (x.get("rated_at") or "")[:19]
+    def _ratings_path(self) -> str:
+        """Trakt 评分接口：仅同步电影时为 movies，否则为 all"""
+        return "movies" if self._only_movies else "all"
 
-        items.sort(key=_rated_at_sort_key, reverse=True)
-        if self._max_sync_count > 0:
-            items = items[: self._max_sync_count]
-            logger.info("本次最多同步 %d 条，已按最近评分取前 N 条", self._max_sync_count)
+    def _etag_scope(self) -> str:
+        """etag 记录的作用域：评分接口或数量限制变化后，上次的 etag 不再适用"""
+        return f"{self._ratings_path()}:{self._max_sync_count}"
 
-        synced: Dict[str, Any] = self.get_data("synced") or {}
-        wait_retry: Dict[str, Any] = self.get_data("wait") or {}
+    def _load_synced(self) -> Dict[str, List[Any]]:
+        """读取已同步记录；首次运行新版本时把旧的 synced（含标题/年份）迁移为紧凑的 synced_v2"""
+        synced = self.get_data("synced_v2")
+        if synced is not None:
+            return synced
+        legacy = self.get_data("synced") or {}
+        synced = {
+            key: [entry["douban_id"], entry.get("trakt_rating")]
+            for key, entry in legacy.items()
+            if isinstance(entry, dict) and entry.get("douban_id")
+        }
+        self.save_data("synced_v2", synced)
+        if legacy:
+            self.del_data("synced")
+            logger.info(f"已迁移 {len(synced)} 条已同步记录到 synced_v2")
+        return synced
 
-        try:
-            douban_helper = DoubanHelper(user_cookie=self._douban_cookie or None)
-        except Exception as e:
-            logger.error(f"初始化豆瓣 Helper 失败（请检查 Cookie/CookieCloud）: {e}")
+    @staticmethod
+    def _log_item_error(ctx: _SyncContext, msg: str, e: Exception) -> None:
+        """记录单条处理异常：每类异常每轮只打印一次堆栈，避免大面积失败时反复格式化 traceback"""
+        if type(e) in ctx.seen_excs:
+            logger.error(f"{msg}: {e!r}")
             return
+        ctx.seen_excs.add(type(e))
+        logger.error(f"{msg}: {e}", exc_info=True)
 
-        success_count = 0
-        fail_count = 0
-        for item in items:
-            try:
-                if self._sync_one(item, douban_helper, synced, wait_retry):
-                    success_count += 1
-                else:
-                    fail_count += 1
-            except Exception as e:
-                fail_count += 1
-                logger.error(f"同步单条失败: {e}", exc_info=True)
+    async def _checkpoint(self, ctx: _SyncContext, force: bool = False) -> None:
+        """批量落盘进度：累计处理（成功或失败）CHECKPOINT_EVERY 条或距上次超过 CHECKPOINT_INTERVAL 秒时保存。
+        在事件循环线程中取 synced/wait_retry/id_cache 的浅拷贝（各条目只整体替换、不原地修改），
+        数据库写入与 id_cache 的剔除、序列化放到线程中执行，不阻塞事件循环。
+        """
+        if not force:
+            if not ctx.dirty:
+                return
+            if ctx.dirty < CHECKPOINT_EVERY and time.monotonic() - ctx.flushed_at < CHECKPOINT_INTERVAL:
+                return
+        # 先清零计数，写入期间其他协程不会重复触发落盘
+        ctx.dirty = 0
+        ctx.flushed_at = time.monotonic()
+        async with ctx.save_lock:
+            synced, wait_retry, id_cache = dict(ctx.synced), dict(ctx.wait_retry), OrderedDict(self._id_cache)
+            await asyncio.to_thread(self._save_progress, synced, wait_retry, id_cache)
 
-        self.save_data("synced", synced)
+    def _save_progress(self, synced: Dict[str, List[Any]], wait_retry: Dict[str, Any],
+                       id_cache: "OrderedDict[str, List[Any]]") -> None:
+        """写入同步进度快照（阻塞调用，需在线程中执行）"""
+        self.save_data("synced_v2", synced)
         self.save_data("wait", wait_retry)
-        logger.info(f"Trakt 评分同步完成: 成功 {success_count}, 失败 {fail_count}")
+        self._save_id_cache(id_cache)
+
+    def _save_id_cache(self, id_cache: "OrderedDict[str, List[Any]]") -> None:
+        """剔除过期项后持久化 id_cache 快照（保留使用顺序），重启后无需冷启动。
+        内存中的过期项查询时按有效期判断、由 LRU 上限淘汰，这里只剔除写入的副本。
+        记录了 TMDB 未匹配到的过期项在 _ID_CACHE_HINT_TTL 内仍保留，以便重新匹配时跳过 TMDB。
+        """
+        now = time.time()
+        self.save_data("id_cache", OrderedDict(
+            (k, v) for k, v in id_cache.items()
+            if self._id_cache_fresh(v, now) or (self._tmdb_missed(v) and now - v[1] < _ID_CACHE_HINT_TTL)
+        ))
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         return [
@@ -362,7 +898,7 @@ class TraktRatingsSync(_PluginBase):
                         "content": [
                             {
                                 "component": "VCol",
-                                "props": {"cols": 12, "md": 6},
+                                "props": {"cols": 12, "md": 4},
                                 "content": [
                                     {
                                         "component": "VTextField",
@@ -374,6 +910,34 @@ class TraktRatingsSync(_PluginBase):
                                     }
                                 ],
                             },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [
+                                    {
+                                        "component": "VTextField",
+                                        "props": {
+                                            "model": "douban_rate",
+                                            "label": "豆瓣提交速率（次/秒）",
+                                            "placeholder": "默认 0.66，即约 1.5 秒提交一次",
+                                        },
+                                    }
+                                ],
+                            },
+                            {
+                                "component": "VCol",
+                                "props": {"cols": 12, "md": 4},
+                                "content": [
+                                    {
+                                        "component": "VTextField",
+                                        "props": {
+                                            "model": "negative_ttl_days",
+                                            "label": "未匹配条目跳过天数",
+                                            "placeholder": "默认 7，期间不再查询豆瓣；0 表示每次都查询",
+                                        },
+                                    }
+                                ],
+                            },
                         ],
                     },
                     {
@@ -406,6 +970,8 @@ class TraktRatingsSync(_PluginBase):
             "private": True,
             "only_movies": True,
             "max_sync_count": 0,
+            "douban_rate": _DOUBAN_RATE_DEFAULT,
+            "negative_ttl_days": _NEGATIVE_TTL_DAYS_DEFAULT,
             "cron": "0 2 * * *",
         }
 
@@ -416,7 +982,9 @@ class TraktRatingsSync(_PluginBase):
         return self._enable
 
     def stop_service(self):
-        pass
+        if self._douban_executor:
+            self._douban_executor.shutdown(wait=False, cancel_futures=True)
+            self._douban_executor = None
 
     @staticmethod
     def get_command() -> List[Dict[str, Any]]:
@@ -442,27 +1010,28 @@ class TraktRatingsSync(_PluginBase):
             logger.error(f"手动同步失败: {e}", exc_info=True)
             return {"success": False, "message": str(e)}
 
-    def get_service(self) -> List[Dict[str, Any]]:
-        if not self._enable:
-            return []
+    @staticmethod
+    def _build_trigger(cron: str) -> Optional[CronTrigger]:
+        """解析 cron 表达式，解析失败时使用默认 0 2 * * *"""
         try:
-            from apscheduler.triggers.cron import CronTrigger
-            cron = (self._cron or "").strip() or "0 2 * * *"
-            trigger = CronTrigger.from_crontab(cron)
+            return CronTrigger.from_crontab((cron or "").strip() or "0 2 * * *")
         except Exception as e:
             logger.warning(f"Trakt 评分同步插件 cron 解析失败，使用默认 0 2 * * *: {e}")
-            try:
-                from apscheduler.triggers.cron import CronTrigger
-                trigger = CronTrigger.from_crontab("0 2 * * *")
-            except Exception:
-                trigger = None
-        if trigger is None:
+        try:
+            return CronTrigger.from_crontab("0 2 * * *")
+        except Exception:
+            return None
+
+    def get_service(self) -> List[Dict[str, Any]]:
+        if not self._enable:
+            return []
+        if self._trigger is None:
             return []
         return [
             {
                 "id": "trakt_ratings_sync",
                 "name": "Trakt 评分同步豆瓣",
-                "trigger": trigger,
+                "trigger": self._trigger,
                 "func": self.sync_trakt_ratings_to_douban,
                 "kwargs": {},
             }
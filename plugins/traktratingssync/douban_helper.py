@@ -3,19 +3,33 @@
 豆瓣书影音档案 Helper（本插件自包含，不依赖 doubanSync 插件）
 用于提交「看过」状态及评分到豆瓣。
 """
+import html
 import re
+import threading
 from typing import List, Optional, Tuple
-from urllib.parse import unquote
 
 import requests
 from bs4 import BeautifulSoup
 from http.cookies import SimpleCookie
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.core.config import settings
 from app.core.meta import MetaBase
 from app.helper.cookiecloud import CookieCloudHelper
 from app.log import logger
 from app.utils.http import RequestUtils
+from .retry_helper import retry_call
+
+# Cookie 作用域，覆盖 www/movie 等子域名
+_COOKIE_DOMAIN = ".douban.com"
+_TITLE_DIV = '<div class="title">'
+# div.title 内的第一个链接：(href, 标题)；标题前有 <h3><span>[电影]</span> 等标签，只在本 div 内、第一个 <a> 之前跳过
+_FIRST_RESULT_RE = re.compile(
+    re.escape(_TITLE_DIV) + r'(?:(?!</div>|<a\b).)*<a\b[^>]*href="([^"]*)"[^>]*>([^<]*)</a>', re.S
+)
+# 搜索结果链接为跳转地址，目标 URL 经过百分号编码（subject%2F123%2F），直接兼容两种写法，无需 unquote
+_SUBJECT_ID_RE = re.compile(r"subject(?:/|%2F)(\d+)(?:/|%2F)", re.I)
 
 
 class DoubanHelper:
@@ -45,8 +59,14 @@ class DoubanHelper:
             "HOST": "www.douban.com",
         }
 
+        # 每个线程各用一个 Session 复用连接（keep-alive），并发提交时互不干扰；
+        # Cookie 统一保存在 _cookie_jar，新建 Session 时复制一份
+        self._local = threading.local()
+        self._cookie_jar = requests.cookies.RequestsCookieJar()
         self.cookies.pop("__utmz", None)
         self.cookies.pop("ck", None)
+        for key, value in self.cookies.items():
+            self._cookie_jar.set(key, value, domain=_COOKIE_DOMAIN)
         self.set_ck()
         self.ck = self.cookies.get("ck")
         logger.debug(f"ck:{self.ck} cookie:{self.cookies}")
@@ -55,22 +75,38 @@ class DoubanHelper:
         if not self.ck:
             logger.error("请求ck失败，请检查传入的cookie登录状态")
 
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的 Session，首次访问时创建"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            # 重试由 set_watching_status 自行处理，适配器不重试
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(total=0))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(self.headers)
+            session.cookies.update(self._cookie_jar)
+            self._local.session = session
+        return session
+
     def set_ck(self) -> None:
-        """刷新豆瓣 ck"""
-        self.headers["Cookie"] = ";".join([f"{key}={value}" for key, value in self.cookies.items()])
-        response = requests.get("https://www.douban.com/", headers=self.headers, timeout=10)
+        """刷新豆瓣 ck（Cookie 由 session.cookies 携带，响应的 Set-Cookie 会写回其中并同步到 _cookie_jar）"""
+        response = self.session.get("https://www.douban.com/", timeout=10)
         ck_str = response.headers.get("Set-Cookie", "")
         logger.debug(ck_str)
         if not ck_str:
-            self.cookies["ck"] = ""
-            return
-        cookie_parts = ck_str.split(";")
-        ck = cookie_parts[0].split("=")[1].strip()
-        logger.debug(ck)
-        if ck == '"deleted"':
-            self.cookies["ck"] = ""
+            ck = ""
         else:
-            self.cookies["ck"] = ck
+            cookie_parts = ck_str.split(";")
+            ck = cookie_parts[0].split("=")[1].strip()
+            logger.debug(ck)
+            if ck == '"deleted"':
+                ck = ""
+        self.cookies["ck"] = ck
+        # 与 Set-Cookie 写入的同名 Cookie 同域同路径，直接覆盖；之后创建的 Session 从 _cookie_jar 复制
+        self.session.cookies.set("ck", ck, domain=_COOKIE_DOMAIN)
+        self._cookie_jar.update(self.session.cookies)
 
     def get_subject_id(self, title: Optional[str] = None, meta: Optional[MetaBase] = None) -> Tuple[Optional[str], Optional[str]]:
         """根据标题在豆瓣搜索，返回 (subject_name, subject_id)"""
@@ -79,22 +115,28 @@ class DoubanHelper:
         if not title:
             return None, None
         url = f"https://www.douban.com/search?cat=1002&q={title}"
-        response = RequestUtils(headers=self.headers, timeout=10).get_res(url=url)
+        response = RequestUtils(session=self.session, headers=self.headers, timeout=10).get_res(url=url)
         if not response or response.status_code != 200:
             logger.error(f"搜索 {title} 失败 状态码：{getattr(response, 'status_code', None)}")
             return None, None
-        soup = BeautifulSoup(response.text.encode("utf-8"), "lxml")
+        # 只需要第一条结果，先用正则直接匹配原始 HTML，避免为整页构建 DOM
+        # 须从第一个 div.title 开始匹配；链接文字含标签等导致第一条未命中时，search 会落到后面的结果，此时改走回退
+        text = response.text
+        match = _FIRST_RESULT_RE.search(text)
+        if match and match.start() == text.find(_TITLE_DIV):
+            subject_match = _SUBJECT_ID_RE.search(match.group(1))
+            return html.unescape(match.group(2)).strip(), subject_match.group(1) if subject_match else None
+        # 页面结构变化导致正则未命中第一条结果时，回退到 BeautifulSoup 解析
+        soup = BeautifulSoup(response.content, "lxml")
         title_divs = soup.find_all("div", class_="title")
         subject_items: List[dict] = []
         for div in title_divs:
             item = {}
             a_tag = div.find_all("a")[0]
             item["title"] = (a_tag.string or "").strip()
-            link = unquote(a_tag.get("href", ""))
-            if "subject/" in link:
-                match = re.search(r"subject/(\d+)/", link)
-                if match:
-                    item["subject_id"] = match.group(1)
+            match = _SUBJECT_ID_RE.search(a_tag.get("href", ""))
+            if match:
+                item["subject_id"] = match.group(1)
             subject_items.append(item)
         if not subject_items:
             logger.error(f"找不到 {title} 相关条目")
@@ -110,10 +152,12 @@ class DoubanHelper:
         rating: Optional[int] = None,
     ) -> bool:
         """设置豆瓣观看状态（想看/在看/看过），可选 1–5 星评分"""
-        self.headers["Referer"] = f"https://movie.douban.com/subject/{subject_id}/"
-        self.headers["Origin"] = "https://movie.douban.com"
-        self.headers["Host"] = "movie.douban.com"
-        self.headers["Cookie"] = ";".join([f"{key}={value}" for key, value in self.cookies.items()])
+        # 每次请求单独传入与 session.headers 合并的 headers，避免并发提交时互相覆盖 Referer
+        headers = {
+            "Referer": f"https://movie.douban.com/subject/{subject_id}/",
+            "Origin": "https://movie.douban.com",
+            "Host": "movie.douban.com",
+        }
         data_json = {
             "ck": self.ck,
             "interest": "do",
@@ -128,16 +172,20 @@ class DoubanHelper:
         if rating is not None and 1 <= rating <= 5:
             data_json["rating"] = str(rating)
         try:
-            response = requests.post(
-                url=f"https://movie.douban.com/j/subject/{subject_id}/interest",
-                headers=self.headers,
-                data=data_json,
-                timeout=10,
+            # 仅在连接失败/超时、429、5xx 时重试；其余 4xx 说明请求本身有问题，重试无意义
+            response = retry_call(
+                lambda: self.session.post(
+                    url=f"https://movie.douban.com/j/subject/{subject_id}/interest",
+                    headers=headers,
+                    data=data_json,
+                    timeout=10,
+                ),
+                label=f"豆瓣提交 subject_id={subject_id}",
             )
         except Exception as e:
             logger.error(f"请求豆瓣失败: {e}")
             return False
-        if not response:
+        if response is None:
             logger.error("豆瓣未返回内容")
             return False
         if response.status_code == 200:
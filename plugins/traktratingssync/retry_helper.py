@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 重试 Helper
+指数退避 + 抖动；429 时优先遵循 Retry-After。Trakt 拉取与豆瓣提交共用。
+"""
+import random
+import time
+from typing import Callable, Optional
+
+import requests
+
+from app.log import logger
+
+# 可重试的网络异常（连接失败/超时），其余异常直接抛出
+RECOVERABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+# Retry-After 最长等待（秒），避免异常值长时间阻塞线程
+_RETRY_AFTER_MAX = 120
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """第 attempt 次重试前的等待秒数：min(cap, base * 2^attempt)，再乘 0.5~1 的随机抖动"""
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random() * 0.5)
+
+
+def retry_after_seconds(resp: Optional[requests.Response]) -> Optional[float]:
+    """解析秒数形式的 Retry-After，HTTP-date 形式或缺失时返回 None"""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return min(_RETRY_AFTER_MAX, max(0.0, float(value))) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_status(resp: Optional[requests.Response]) -> bool:
+    """无响应（RequestUtils 吞掉了网络异常）、429 或 5xx 时重试；其余 4xx 直接失败"""
+    return resp is None or resp.status_code == 429 or resp.status_code >= 500
+
+
+def retry_call(call: Callable[[], Optional[requests.Response]], *, retries: int = 3,
+               base: float = 1.0, cap: float = 30.0,
+               should_retry: Callable[[Optional[requests.Response]], bool] = is_retryable_status,
+               label: str = "HTTP 请求") -> Optional[requests.Response]:
+    """执行 call 并按需重试，返回最后一次的响应；最后一次仍抛出可重试异常时向上抛出。
+    阻塞 sleep，需在线程中调用。
+    """
+    attempt = 0
+    while True:
+        try:
+            resp = call()
+        except RECOVERABLE_ERRORS as e:
+            if attempt >= retries:
+                raise
+            delay = backoff_delay(attempt, base, cap)
+            reason = str(e)
+        else:
+            if attempt >= retries or not should_retry(resp):
+                return resp
+            delay = retry_after_seconds(resp) if resp is not None and resp.status_code == 429 else None
+            if delay is None:
+                delay = backoff_delay(attempt, base, cap)
+            reason = f"status={resp.status_code}" if resp is not None else "无响应"
+        attempt += 1
+        logger.warning(f"{label} 失败（{reason}），{delay:.1f} 秒后第 {attempt} 次重试")
+        time.sleep(delay)